@@ -4,9 +4,9 @@ index_bursts.py
 Written by: Enrico Ciraci' - February 2024
 
 Identify Sentinel-1 bursts covering the selected area of interest.
-Save the generated index to an ESRI shapefile.
+Save the generated index to a vector file (FlatGeobuf by default).
 
-usage: index_bursts.py [-h] [-D BURST_DIR] burst_file aoi
+usage: index_bursts.py [-h] [-D BURST_DIR] [-F {fgb,gpkg,shp}] burst_file aoi
 
 Identify bursts of the same satellite track covering the selected area
 of interest.
@@ -19,8 +19,16 @@ options:
   -h, --help            show this help message and exit
   -D BURST_DIR, --burst_dir BURST_DIR
                         Directory containing the Sentinel-1 bursts files
+  -F {fgb,gpkg,shp}, --format {fgb,gpkg,shp}
+                        Output index file format.
 
 Python Dependencies:
+- numpy: The fundamental package for scientific computing with Python.
+    https://numpy.org
+- pandas: Python Data Analysis Library.
+    https://pandas.pydata.org
+- shapely: Manipulation and analysis of geometric objects.
+    https://shapely.readthedocs.io
 - geopandas: Python tools for working with geospatial data in python.
     https://geopandas.org
 
@@ -29,11 +37,16 @@ Python Dependencies:
 import os
 import argparse
 import re
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from pathlib import Path
-# - External modules
-import geopandas as gpd
-from xml_utils import extract_xml_from_zip
+
+# - Burst archive name pattern - burst identifier embedded in the file name:
+# - <track><orbit direction><burst><subswath> - e.g. 015A0206IW3
+BURST_ID_PATTERN = re.compile(r"(?P<track>\d{3})(?P<orbit>[AD]?)"
+                              r"(?P<burst>\d{4})(?P<subswath>IW\d)"
+                              r".*\.zip$")
 
 
 def orbit_direction(f_name: str, track: str, burst: str, subswath: str) -> str:
@@ -48,12 +61,10 @@ def orbit_direction(f_name: str, track: str, burst: str, subswath: str) -> str:
     Returns:
         str: "A" for ascending orbit, "D" for descending orbit, "U" for unknown
     """
-    asc_pattern = re.compile(f"{track}A{burst}{subswath}")
-    dsc_pattern = re.compile(f"{track}D{burst}{subswath}")
-    if re.search(asc_pattern, f_name):
+    if f"{track}A{burst}{subswath}" in f_name:
         # - Ascending orbit
         return "A"
-    elif re.search(dsc_pattern, f_name):
+    elif f"{track}D{burst}{subswath}" in f_name:
         # - Descending orbit
         return "D"
     else:
@@ -61,6 +72,26 @@ def orbit_direction(f_name: str, track: str, burst: str, subswath: str) -> str:
         return "U"
 
 
+def index_burst_files(file_list: list[str]) -> dict:
+    """
+    Parse the burst file names once and index them by burst identifier.
+    Args:
+        file_list: list of file names available in the burst directory
+
+    Returns:
+        dict: (track, burst, subswath) -> list of (file name, orbit direction)
+    """
+    burst_index = defaultdict(list)
+    for f_name in file_list:
+        match = BURST_ID_PATTERN.search(f_name)
+        if match is None:
+            continue
+        burst_index[(match["track"], match["burst"],
+                     match["subswath"])].append(
+            (f_name, match["orbit"] or "U"))
+    return burst_index
+
+
 def main() -> None:
     # - Parse command line arguments
     parser = argparse.ArgumentParser(
@@ -77,133 +108,133 @@ def main() -> None:
     parser.add_argument('-D', '--burst_dir', type=str,
                         default=os.getcwd(), help='Directory containing the '
                                                   'Sentinel-1 bursts files.')
-    # - Add
+    # - Output file format
+    parser.add_argument('-F', '--format', type=str, default='fgb',
+                        choices=['fgb', 'gpkg', 'shp'],
+                        help='Output index file format.')
 
     args = parser.parse_args()
 
     # - Verify if reference file exists
+    if not os.path.exists(args.burst_file):
+        raise FileNotFoundError(f"# - Burst index File {args.burst_file} "
+                                f"does not exist.")
     if not os.path.exists(args.aoi):
         raise FileNotFoundError(f"# - AOI File {args.aoi} does not exist.")
     if not os.path.exists(args.burst_dir):
         raise ValueError(f"# - Data directory: {args.burst_dir} not found.")
 
+    # - Import external modules only after validating the input arguments
+    import numpy as np
+    import pandas as pd
+    import shapely
+    from read_as_geodataframe import read_vector_file, write_vector_file, \
+        VECTOR_FORMATS
+    from iride_utils.zip_meta_cache import cached_extract_xml_from_zip
+
     # - Read the input file with geopandas
-    burst_gdf = gpd.read_file(args.burst_file).to_crs("EPSG:4326")
+    # - Read only the attributes included in the output index
+    burst_gdf = read_vector_file(args.burst_file,
+                                 columns=["Name", "Track",
+                                          "Burst", "Subswath"])
+    if burst_gdf.crs != "EPSG:4326":
+        burst_gdf = burst_gdf.to_crs("EPSG:4326")
 
     # - Import aoi boundaries shapefile with geopandas
     aoi_file = args.aoi
-    aoi_gdf = gpd.read_file(aoi_file).to_crs("EPSG:4326")
+    aoi_gdf = read_vector_file(aoi_file, columns=[])
+    if aoi_gdf.crs != "EPSG:4326":
+        aoi_gdf = aoi_gdf.to_crs("EPSG:4326")
 
     # - Find the intersection between the aoi and the bursts shapefiles
     print("# - Looking for bursts covering the selected area of interest.")
-    aoi_bursts = gpd.sjoin(burst_gdf, aoi_gdf,
-                           predicate="intersects", how="inner")
-    aoi_bursts = aoi_bursts[burst_gdf.columns]
-
-    # - Loop though the generated dataframe and verify if the file relative
-    # - to the burst exists in the burst directory.
-    burst_dir_content = os.listdir(args.burst_dir)
-    name_list = []              # - List of burst names
-    track_list = []             # - List of track numbers
-    burst_list = []             # - List of burst numbers
-    subswath_list = []          # - List of subswath numbers
-    geometry_list = []          # - List of geometries
-    path_to_bursts = []         # - Path to the bursts
-    start_date = []             # - Start date of the burst
-    end_date = []               # - End date of the burst
-    c_type = []                 # - Calibrated or not
-    orbit_dir_list = []         # - Orbit direction
+    # - Discard the bursts outside the AOI bounding box before
+    # - building the spatial index.
+    x_min, y_min, x_max, y_max = aoi_gdf.total_bounds
+    bounds = burst_gdf.bounds.to_numpy()
+    in_bbox = ((bounds[:, 0] <= x_max) & (bounds[:, 2] >= x_min)
+               & (bounds[:, 1] <= y_max) & (bounds[:, 3] >= y_min))
+    burst_gdf = burst_gdf[in_bbox]
+    # - Query the spatial index of the burst index, which is
+    # - the larger of the two dataframes, with the AOI geometries.
+    # - AOI geometries are prepared once so that GEOS can reuse
+    # - their internal index for all the candidate intersection tests.
+    aoi_geoms = aoi_gdf.geometry.to_numpy()
+    shapely.prepare(aoi_geoms)
+    _, burst_idx = burst_gdf.sindex.query(aoi_geoms, predicate="intersects")
+    aoi_bursts = burst_gdf.iloc[np.sort(burst_idx)]
 
     if len(aoi_bursts) == 0:
         raise ValueError("# - No bursts found covering "
                          "the selected area of interest.")
 
-    for index, row in aoi_bursts.iterrows():
-        track = row["Track"]
-        burst = row["Burst"]
-        subswath = row["Subswath"]
-        re_pattern = re.compile(f"{track}.*{burst}{subswath}")
-        found_bursts = [bst for bst in burst_dir_content if
-                        re.search(re_pattern, bst) and bst.endswith(".zip")]
-
-        if len(found_bursts) > 0:
-            for bi in range(len(found_bursts)):
-                # - Append the burst info to the lists
-                name_list.append(row["Name"])
-                track_list.append(row["Track"])
-                burst_list.append(row["Burst"])
-                orbit_dir_list.append(
-                    orbit_direction(found_bursts[bi], row["Track"],
-                                    row["Burst"], row["Subswath"]))
-                subswath_list.append(row["Subswath"])
-                geometry_list.append(row["geometry"])
-                # - Add other info
-                path_to_bursts.append(os.path.join(args.burst_dir,
-                                                   found_bursts[bi]))
-                # - Extract xml metadata file from the zip file
-                meta_dict \
-                    = extract_xml_from_zip(os.path.join(args.burst_dir,
-                                                        found_bursts[bi]))[0]
-                # -
-                start_date.append(meta_dict['start_date'])
-                end_date.append(meta_dict['end_date'])
-
-                # - Valid only for TRE-A data
-                # - Extract Input Product type from file name
-                p_f_name = found_bursts[bi].split('_')
-                if p_f_name[4].endswith('B'):
-                    # - Basic Products
-                    c_type.append('B')
-                elif p_f_name[4].endswith('C'):
-                    # - Calibrated Products
-                    c_type.append('C')
-                else:
-                    # - Calibration level not included in
-                    # - the file name considered field.
-                    # - Refer to the xml or product id in this case.
-                    c_type.append('None')
+    # - Verify if the files relative to the selected bursts exist
+    # - in the burst directory and collect their info.
+    with os.scandir(args.burst_dir) as dir_entries:
+        burst_dir_content = [entry.name for entry in dir_entries
+                             if entry.name.endswith(".zip")
+                             and entry.is_file()]
+    burst_index = index_burst_files(burst_dir_content)
+    burst_keys = ["Track", "Burst", "Subswath"]
+    found_bursts = [(key, f_name, orbit)
+                    for key in dict.fromkeys(
+                        zip(*[aoi_bursts[k] for k in burst_keys]))
+                    for f_name, orbit in burst_index.get(key, ())]
+
+    # - Extract xml metadata files from the zip files.
+    # - Archives are read concurrently, this is an I/O bound operation.
+    burst_dir_prefix = os.path.join(args.burst_dir, '')
+    burst_paths = [burst_dir_prefix + f_name for _, f_name, _ in found_bursts]
+    with ThreadPoolExecutor() as executor:
+        meta_dicts = [xml_dicts[0] for xml_dicts in
+                      executor.map(cached_extract_xml_from_zip, burst_paths)]
+
+    burst_records = []
+    for (key, f_name, orbit), burst_path, meta_dict \
+            in zip(found_bursts, burst_paths, meta_dicts):
+        # - Valid only for TRE-A data
+        # - Extract Input Product type from file name
+        p_f_name = f_name.split('_')
+        if p_f_name[4].endswith('B'):
+            # - Basic Products
+            c_type = 'B'
+        elif p_f_name[4].endswith('C'):
+            # - Calibrated Products
+            c_type = 'C'
         else:
-            # - Append the burst info to the lists
-            name_list.append(row["Name"])
-            track_list.append(row["Track"])
-            burst_list.append(row["Burst"])
-            subswath_list.append(row["Subswath"])
-            geometry_list.append(row["geometry"])
-            # - Set other info to None if the burst file is not found
-            orbit_dir_list.append('None')
-            path_to_bursts.append('None')
-            start_date.append('None')
-            end_date.append('None')
-            c_type.append('None')
-
-    # - Create a new dataframe with the burst info
-    aoi_bursts = gpd.GeoDataFrame({
-        "Name": name_list,
-        "Track": track_list,
-        "Burst": burst_list,
-        "Subswath": subswath_list,
-        "Orbit_Dir": orbit_dir_list,
-        "c_type": c_type,
-        "geometry": geometry_list,
-        "Path": path_to_bursts,
-        "start_date": start_date,
-        "end_date": end_date,
-    })
-
-    # - set the crs of the dataframe
-    aoi_bursts.crs = "EPSG:4326"
-
-    # - Create directory to save the shapefile
+            # - Calibration level not included in
+            # - the file name considered field.
+            # - Refer to the xml or product id in this case.
+            c_type = 'None'
+
+        burst_records.append((*key, orbit, c_type, burst_path,
+                              meta_dict['start_date'],
+                              meta_dict['end_date']))
+
+    found_df = pd.DataFrame.from_records(
+        burst_records, columns=[*burst_keys, "Orbit_Dir", "c_type",
+                                "Path", "start_date", "end_date"]
+    )
+    # - Add the burst info to the dataframe.
+    # - Set other info to None if the burst file is not found.
+    aoi_bursts = aoi_bursts.merge(found_df, on=burst_keys, how="left")
+    aoi_bursts = aoi_bursts.fillna(
+        {c: 'None' for c in found_df.columns if c not in burst_keys})
+    aoi_bursts = aoi_bursts[["Name", *burst_keys, "Orbit_Dir", "c_type",
+                             "geometry", "Path", "start_date", "end_date"]]
+
+    # - Create directory to save the index file
     out_dir = Path(args.burst_dir).parent / Path('AOIs_bursts')
     os.makedirs(out_dir, exist_ok=True)
 
-    # - Save the dataframe to a shapefile
-    out_shp = out_dir / Path(aoi_file).name
+    # - Save the dataframe to a vector file
+    driver, extension = VECTOR_FORMATS[args.format]
+    out_file = out_dir / Path(aoi_file).with_suffix(extension).name
     # -  if a column named 'overlap' exists, remove it
     if 'overlap' in aoi_bursts.columns:
         aoi_bursts = aoi_bursts.drop(columns=['overlap'])
-    aoi_bursts.to_file(str(out_shp), driver="ESRI Shapefile")
-    print(f"# - Shapefile saved to {out_shp}")
+    write_vector_file(aoi_bursts, out_file, driver)
+    print(f"# - Index file saved to {out_file}")
 
 
 if __name__ == "__main__":
@@ -4,9 +4,9 @@ index_tiles.py
 Written by: Enrico Ciraci' - February 2024
 
 Identify IRIDE S3-01-SNT-03 Tiles covering the selected area of interest.
-Save the generated index to an ESRI shapefile.
+Save the generated index to a vector file (FlatGeobuf by default).
 
-usage: index_bursts.py [-h] [-T TILE_DIR] burst_file aoi
+usage: index_bursts.py [-h] [-T TILE_DIR] [-F {fgb,gpkg,shp}] burst_file aoi
 
 Identify bursts of the same satellite track covering the selected area
 of interest.
@@ -19,8 +19,16 @@ options:
   -h, --help            show this help message and exit
   -T TILE_DIR, --tile_dir TILE_DIR
                         Directory containing the IRIDE S3-01-SNT-03 Tiles
+  -F {fgb,gpkg,shp}, --format {fgb,gpkg,shp}
+                        Output index file format.
 
 Python Dependencies:
+- numpy: The fundamental package for scientific computing with Python.
+    https://numpy.org
+- pandas: Python Data Analysis Library.
+    https://pandas.pydata.org
+- shapely: Manipulation and analysis of geometric objects.
+    https://shapely.readthedocs.io
 - geopandas: Python tools for working with geospatial data in python.
     https://geopandas.org
 
@@ -29,12 +37,33 @@ Python Dependencies:
 import os
 import argparse
 import re
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from pathlib import Path
-# - External modules
-import numpy as np
-import geopandas as gpd
-from xml_utils import extract_xml_from_zip
+
+# - Tile archive name pattern - tile identifier embedded in the file name:
+# - E<easting>N<northing><ortho> - e.g. E45N22V
+TILE_ID_PATTERN = re.compile(r"(?P<tile_code>E\d+N\d+)(?P<ortho>[VE])"
+                             r".*\.zip$")
+
+
+def index_tile_files(file_list: list[str]) -> dict:
+    """
+    Parse the tile file names once and index them by tile identifier.
+    Args:
+        file_list: list of file names available in the tile directory
+
+    Returns:
+        dict: (tile code, ortho) -> file name
+    """
+    tile_index = {}
+    for f_name in file_list:
+        match = TILE_ID_PATTERN.search(f_name)
+        if match is None:
+            continue
+        # - Keep the first file found for each tile
+        tile_index.setdefault((match["tile_code"], match["ortho"]), f_name)
+    return tile_index
 
 
 def main() -> None:
@@ -56,64 +85,114 @@ def main() -> None:
                         default=os.getcwd(), help='Directory containing the '
                                                   'Tiles files.')
 
+    # - Output file format
+    parser.add_argument('-F', '--format', type=str, default='fgb',
+                        choices=['fgb', 'gpkg', 'shp'],
+                        help='Output index file format.')
+
     args = parser.parse_args()
 
     # - Verify if reference file exists
+    if not os.path.exists(args.tile_file):
+        raise FileNotFoundError(f"# - Tile index File {args.tile_file} "
+                                f"does not exist.")
     if not os.path.exists(args.aoi):
         raise FileNotFoundError(f"# - AOI File {args.aoi} does not exist.")
     if not os.path.isdir(args.tile_dir):
         raise ValueError(f"# - Data directory: {args.tile_dir} not found.")
 
+    # - Import external modules only after validating the input arguments
+    import numpy as np
+    import pandas as pd
+    import shapely
+    from read_as_geodataframe import read_vector_file, write_vector_file, \
+        VECTOR_FORMATS
+    from iride_utils.zip_meta_cache import cached_extract_xml_from_zip
+
     # - Read the input file with geopandas
-    tile_gdf = gpd.read_file(args.tile_file).to_crs("EPSG:4326")
+    tile_gdf = read_vector_file(args.tile_file)
+    if tile_gdf.crs != "EPSG:4326":
+        tile_gdf = tile_gdf.to_crs("EPSG:4326")
 
     # - Import aoi boundaries shapefile with geopandas
     aoi_file = args.aoi
-    aoi_gdf = gpd.read_file(aoi_file).to_crs("EPSG:4326")
+    aoi_gdf = read_vector_file(aoi_file, columns=[])
+    if aoi_gdf.crs != "EPSG:4326":
+        aoi_gdf = aoi_gdf.to_crs("EPSG:4326")
 
     # - Find the intersection between the aoi and the bursts shapefiles
     print("# - Looking for Tiles covering the selected area of interest.")
-    aoi_tiles = gpd.sjoin(tile_gdf, aoi_gdf,
-                          predicate="intersects", how="inner")
-    aoi_tiles = aoi_tiles[tile_gdf.columns]
+    # - Discard the tiles outside the AOI bounding box before
+    # - building the spatial index.
+    x_min, y_min, x_max, y_max = aoi_gdf.total_bounds
+    bounds = tile_gdf.bounds.to_numpy()
+    in_bbox = ((bounds[:, 0] <= x_max) & (bounds[:, 2] >= x_min)
+               & (bounds[:, 1] <= y_max) & (bounds[:, 3] >= y_min))
+    tile_gdf = tile_gdf[in_bbox]
+    # - Query the spatial index of the tile index, which is
+    # - the larger of the two dataframes, with the AOI geometries.
+    # - AOI geometries are prepared once so that GEOS can reuse
+    # - their internal index for all the candidate intersection tests.
+    aoi_geoms = aoi_gdf.geometry.to_numpy()
+    shapely.prepare(aoi_geoms)
+    _, tile_idx = tile_gdf.sindex.query(aoi_geoms, predicate="intersects")
+    aoi_tiles = tile_gdf.iloc[np.sort(tile_idx)]
 
     # - Loop though the generated dataframe and verify if the file relative
     # - to the tile exists in the tile directory.
-    tile_dir_content = os.listdir(args.tile_dir)
+    with os.scandir(args.tile_dir) as dir_entries:
+        tile_dir_content = [entry.name for entry in dir_entries
+                            if entry.name.endswith(".zip")
+                            and entry.is_file()]
+    tile_index = index_tile_files(tile_dir_content)
 
     if len(aoi_tiles) == 0:
         raise ValueError("# - No tiles found covering "
                          "the selected area of interest.")
+    # - NOTE: tile identifiers are computed from the geometries projected
+    # - back from EPSG:4326, as in the original implementation. The round
+    # - trip can move tile edges just below a 100 km boundary, so a few
+    # - codes may not match the CellCode attribute of the tile index.
     aoi_tiles = aoi_tiles.reset_index(drop=True).to_crs("EPSG:3035")
-    aoi_tiles_v = aoi_tiles.copy()
-    aoi_tiles_e = aoi_tiles.copy()
 
+    # - Extract tiles identifier from the first vertex of their exterior.
+    # - For MultiPolygon tiles, the exterior of the first part is used.
+    tile_geoms = aoi_tiles.geometry.to_numpy()
+    first_vertex = shapely.get_point(
+        shapely.get_exterior_ring(shapely.get_geometry(tile_geoms, 0)), 0)
+    if shapely.is_missing(first_vertex).any():
+        raise ValueError("# - Tile geometries must be Polygon "
+                         "or MultiPolygon.")
+    xc = np.floor(shapely.get_x(first_vertex) / 1e5).astype(np.int64)
+    yc = np.ceil(shapely.get_y(first_vertex) / 1e5).astype(np.int64)
+    tile_codes = [f"E{x}N{y}" for x, y in zip(xc, yc)]
+
+    # - Extract xml metadata files from the zip files.
+    # - Archives are read concurrently, this is an I/O bound operation.
+    tile_dir_prefix = os.path.join(args.tile_dir, '')
+    tile_paths = [tile_dir_prefix + tile_index[(tile_code, ort)]
+                  for ort in ['V', 'E'] for tile_code in tile_codes
+                  if (tile_code, ort) in tile_index]
+    with ThreadPoolExecutor() as executor:
+        tile_meta = dict(zip(tile_paths,
+                             executor.map(cached_extract_xml_from_zip,
+                                          tile_paths)))
+
+    ortho_tiles = []
     for ort in ['V', 'E']:
         path_to_tiles = []
         start_date = []
         end_date = []
-        ortho = []
-
-        for index, row in aoi_tiles_v.iterrows():
-            # - Extract tile identifier
-            x_c, y_c = row['geometry'].exterior.coords[0]
-            xc_str = str(int(np.floor(x_c/1e5)))
-            yc_str = str(int(np.ceil(y_c/1e5)))
 
+        for tile_code in tile_codes:
             # - Check for both Vertical and East-West Ortho Products.
-            print(f"# - Looking for tile E{xc_str}N{yc_str}{ort}")
-            re_pattern = re.compile(f"E{xc_str}N{yc_str}{ort}")
-            found_tile = [tile for tile in tile_dir_content if
-                          re.search(re_pattern, tile)
-                          and tile.endswith(".zip")]
-
-            if len(found_tile) > 0:
-                path_to_tiles.append(os.path.join(args.tile_dir,
-                                                  found_tile[0]))
-                # - Extract xml metadata file from the zip file
-                meta_dict \
-                    = extract_xml_from_zip(os.path.join(args.tile_dir,
-                                                        found_tile[0]))[0]
+            print(f"# - Looking for tile {tile_code}{ort}")
+            found_tile = tile_index.get((tile_code, ort))
+
+            if found_tile is not None:
+                tile_path = tile_dir_prefix + found_tile
+                path_to_tiles.append(tile_path)
+                meta_dict = tile_meta[tile_path][0]
                 # -
                 try:
                     start_date.append(meta_dict['start_date'])
@@ -122,40 +201,32 @@ def main() -> None:
                     # - If the metadata file does not contain the start and end
                     # - date, extract it from thr filename.
                     # - NOTE - This should be a temporary solution.
-                    start_date.append(found_tile[0].split('_')[2])
-                    end_date.append(found_tile[0].split('_')[3])
+                    start_date.append(found_tile.split('_')[2])
+                    end_date.append(found_tile.split('_')[3])
             else:
                 path_to_tiles.append('None')
                 start_date.append('None')
                 end_date.append('None')
-            ortho.append(ort)
-
-        if ort == 'V':
-            # - Add the path to the bursts to the dataframe
-            aoi_tiles_v["Path"] = path_to_tiles
-            aoi_tiles_v["Ortho"] = ortho
-            aoi_tiles_v["start_date"] = start_date
-            aoi_tiles_v["end_date"] = end_date
-        else:
-            # - Add the path to the bursts to the dataframe
-            aoi_tiles_e["Path"] = path_to_tiles
-            aoi_tiles_e["Ortho"] = ortho
-            aoi_tiles_e["start_date"] = start_date
-            aoi_tiles_e["end_date"] = end_date
+
+        # - Add the path to the tiles to the dataframe
+        ortho_tiles.append(aoi_tiles.assign(Path=path_to_tiles, Ortho=ort,
+                                            start_date=start_date,
+                                            end_date=end_date))
 
     # - Merge the two dataframes
-    aoi_tiles = aoi_tiles_v._append(aoi_tiles_e, ignore_index=True)
-    # - Create directory to save the shapefile
+    aoi_tiles = pd.concat(ortho_tiles, ignore_index=True)
+    # - Create directory to save the index file
     out_dir = Path(args.tile_dir).parent / Path('AOIs_tiles')
     os.makedirs(out_dir, exist_ok=True)
 
-    # - Save the dataframe to a shapefile
-    out_shp = out_dir / Path(aoi_file).name
+    # - Save the dataframe to a vector file
+    driver, extension = VECTOR_FORMATS[args.format]
+    out_file = out_dir / Path(aoi_file).with_suffix(extension).name
     # -  if a column named 'overlap' exists, remove it
     if 'overlap' in aoi_tiles.columns:
-        aoi_bursts = aoi_tiles.drop(columns=['overlap'])
-    aoi_tiles.to_file(str(out_shp), driver="ESRI Shapefile")
-    print(f"# - Shapefile saved to {out_shp}")
+        aoi_tiles = aoi_tiles.drop(columns=['overlap'])
+    write_vector_file(aoi_tiles, out_file, driver)
+    print(f"# - Index file saved to {out_file}")
 
 
 if __name__ == '__main__':
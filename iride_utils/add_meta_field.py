@@ -6,6 +6,46 @@ Metadata Template for commonly used datasets
 # - Python Modules
 import xml.etree.ElementTree as ET
 
+# - Accepted dataset names -> template name
+_ALIASES = {
+    'TINITALY': 'tinitaly',
+    'Tinitaly': 'tinitaly',
+    'Tinitaly-10': 'tinitaly',
+    'OpenStreetMap': 'osm',
+    'OSM': 'osm',
+    'Copernicus': 'copdem',
+    'CopDem': 'copdem',
+}
+
+# - Other EO Non-EO Input Data templates
+# - NOTE: the fields are added to the XML tree in the listed order.
+_TEMPLATES = {
+    'tinitaly': {
+        'input_id': 'S3-NEO-I01',
+        'version': 'Tinitaly-10',
+        'description': ("Tarquini S., I. Isola, M. Favalli, A. Battistini,"
+                        "G. Dotta (2023). TINITALY, a digital elevation model "
+                        "of Italy with a 10 meters cell size (Version 1.1). "
+                        "Istituto Nazionale di Geofisica e Vulcanologia "
+                        "(INGV). https://doi.org/10.13127/tinitaly/1.1."),
+    },
+    'osm': {
+        'input_id': 'S3-NEO-I09',
+        'version': 'OpenStreetMap',
+        'description': ("OpenStreetMap (Version 1.0). OpenStreetMap "
+                        "Foundation. https://doi.org/10.13127/osm/1.0."),
+    },
+    # - Copernicus DEM
+    'copdem': {
+        'input_id': 'S3-NEO-I01',
+        'version': 'Cop-DEM - Resolution (m) 30 x 30',
+        'description': ("Copernicus Digital Elevation Model (DEM) "
+                        "(Version 1.0). "
+                        "https://spacedata.copernicus.eu/collections/"
+                        "copernicus-digital-elevation-model."),
+    },
+}
+
 
 def add_meta_field(tree: ET.Element, dataset: str) -> None:
     """
@@ -14,44 +54,10 @@ def add_meta_field(tree: ET.Element, dataset: str) -> None:
     :param dataset: dataset name
     :return: None
     """
-    if dataset in ['TINITALY', 'Tinitaly', 'Tinitaly-10']:
-        # - Other EO Non-EO Input Data
-        input_x = ET.SubElement(tree, 'input')
-        input_id = ET.SubElement(input_x, 'input_id')
-        input_id.text = 'S3-NEO-I01'
-        version = ET.SubElement(input_x, 'version')
-        version.text = 'Tinitaly-10'
-        description = ET.SubElement(input_x, 'description')
-        description.text \
-            = ("Tarquini S., I. Isola, M. Favalli, A. Battistini,"
-               "G. Dotta (2023). TINITALY, a digital elevation model "
-               "of Italy with a 10 meters cell size (Version 1.1). "
-               "Istituto Nazionale di Geofisica e Vulcanologia (INGV). "
-               "https://doi.org/10.13127/tinitaly/1.1.")
-
-    elif dataset in ['OpenStreetMap', 'OSM']:
-        # - Other EO Non-EO Input Data
-        input_x = ET.SubElement(tree, 'input')
-        input_id = ET.SubElement(input_x, 'input_id')
-        input_id.text = 'S3-NEO-I09'
-        version = ET.SubElement(input_x, 'version')
-        version.text = 'OpenStreetMap'
-        description = ET.SubElement(input_x, 'description')
-        description.text \
-            = ("OpenStreetMap (Version 1.0). OpenStreetMap "
-               "Foundation. https://doi.org/10.13127/osm/1.0.")
+    template = _TEMPLATES.get(_ALIASES.get(dataset))
+    if template is None:
+        raise ValueError(f"Dataset {dataset} not found.")
 
-    elif dataset in ['Copernicus', 'CopDem']:
-        # - Copernicus DEM
-        input_x = ET.SubElement(tree, 'input')
-        input_id = ET.SubElement(input_x, 'input_id')
-        input_id.text = 'S3-NEO-I01'
-        version = ET.SubElement(input_x, 'version')
-        version.text = 'Cop-DEM - Resolution (m) 30 x 30'
-        description = ET.SubElement(input_x, 'description')
-        description.text \
-            = ("Copernicus Digital Elevation Model (DEM) (Version 1.0). "
-               "https://spacedata.copernicus.eu/collections/"
-               "copernicus-digital-elevation-model.")
-    else:
-        raise ValueError(f"Dataset {dataset} not found.")
\ No newline at end of file
+    input_x = ET.SubElement(tree, 'input')
+    for field, value in template.items():
+        ET.SubElement(input_x, field).text = value
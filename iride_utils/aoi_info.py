@@ -2,6 +2,45 @@
 Written by Enrico Ciraci' - February 2024
 Return IRIDE AOIs information
 """
+# - AOI tag, AOI name, accepted aliases [lower case]
+_AOI_ROWS = [
+    ('NTR', 'A2 - Nocera Terinese',
+     ['nocera_terinese', 'ntr', 'nocera terinese']),
+    ('PAL', 'Palermo', ['palermo', 'pal']),
+    ('BRN', 'Brennero Area', ['brennero', 'brn']),
+    ('CRT', 'Cortina', ['cortina', 'crt']),
+    ('NRI', 'Norcia', ['norcia', 'nri']),
+    ('PST', 'Pistoia', ['pistoia', 'pst']),
+    ('mti', 'Mattinata', ['mattinata', 'mti']),
+    ('coa', 'Colli ALbani Area', ['colli_albani', 'coa']),
+    ('VLA', 'Vulcano Island', ['vulcano', 'vla']),
+    # - Italian Regions
+    ('CAL', 'Calabria', ['calabria', 'cal']),
+    ('SIC', 'Sicilia', ['sicilia', 'sic']),
+    ('BAS', 'Basilicata', ['basilicata', 'bas']),
+    ('PUG', 'Puglia', ['puglia', 'pug']),
+    ('CAM', 'Campania', ['campania', 'cam']),
+    ('MOL', 'Molise', ['molise', 'mol']),
+    ('ABR', 'Abruzzo', ['abruzzo', 'abr']),
+    ('LAZ', 'Lazio', ['lazio', 'laz']),
+    ('UMB', 'Umbria', ['umbria', 'umb']),
+    ('MAR', 'Marche', ['marche', 'mar']),
+    ('ERA', 'Emilia Romagna', ['emilia_romagna', 'era']),
+    ('TOS', 'Toscana', ['toscana', 'tos']),
+    ('LOM', 'Lombardia', ['lombardia', 'lom']),
+    ('PIE', 'Piemonte', ['piemonte', 'pie']),
+    ('SAR', 'Sardegna', ['sardegna', 'sar']),
+    ('TAA', 'Trentino Alto Adige', ['trentino', 'taa']),
+    ('VEN', 'Veneto', ['veneto', 'ven']),
+    ('FVG', 'Friuli Venezia Giulia', ['friuli_venezia_giulia', 'fvg']),
+    ('LIG', 'Liguria', ['liguria', 'lig']),
+    ('VDA', 'Valle d\'Aosta', ['valle_d_aosta', 'vda']),
+]
+
+# - Alias -> (AOI tag, AOI name)
+_AOI_TABLE = {alias: (aoi_tag, aoi_name)
+              for aoi_tag, aoi_name, aliases in _AOI_ROWS
+              for alias in aliases}
 
 
 def get_aoi_info(aoi: str) -> dict:
@@ -12,125 +51,9 @@ def get_aoi_info(aoi: str) -> dict:
     """
     # - convert to all lower case
     aoi = aoi.lower()
-
-    if aoi in ['nocera_terinese', 'ntr', 'nocera terinese']:
-        aoi_tag = 'NTR'
-        aoi_name = 'A2 - Nocera Terinese'
-
-    elif aoi in ['palermo', 'pal']:
-        aoi_tag = 'PAL'
-        aoi_name = 'Palermo'
-
-    elif aoi in ['brennero', 'brn']:
-        aoi_tag = 'BRN'
-        aoi_name = 'Brennero Area'
-
-    elif aoi in ['cortina', 'crt']:
-        aoi_tag = 'CRT'
-        aoi_name = 'Cortina'
-
-    elif aoi in ['norcia', 'nri']:
-        aoi_tag = 'NRI'
-        aoi_name = 'Norcia'
-
-    elif aoi in ['pistoia', 'pst']:
-        aoi_tag = 'PST'
-        aoi_name = 'Pistoia'
-
-    elif aoi in ['mattinata', 'mti']:
-        aoi_tag = 'mti'
-        aoi_name = 'Mattinata'
-
-    elif aoi in ['colli_albani', 'coa']:
-        aoi_tag = 'coa'
-        aoi_name = 'Colli ALbani Area'
-
-    elif aoi in ['Vulcano', 'vla']:
-        aoi_tag = 'VLA'
-        aoi_name = 'Vulcano Island'
-
-    # - Italian Regions
-    elif aoi in ['calabria', 'cal']:
-        aoi_tag = 'CAL'
-        aoi_name = 'Calabria'
-
-    elif aoi in ['sicilia', 'sic']:
-        aoi_tag = 'SIC'
-        aoi_name = 'Sicilia'
-
-    elif aoi in ['basilicata', 'bas']:
-        aoi_tag = 'BAS'
-        aoi_name = 'Basilicata'
-
-    elif aoi in ['puglia', 'pug']:
-        aoi_tag = 'PUG'
-        aoi_name = 'Puglia'
-
-    elif aoi in ['campania', 'cam']:
-        aoi_tag = 'CAM'
-        aoi_name = 'Campania'
-
-    elif aoi in ['molise', 'mol']:
-        aoi_tag = 'MOL'
-        aoi_name = 'Molise'
-
-    elif aoi in ['abruzzo', 'abr']:
-        aoi_tag = 'ABR'
-        aoi_name = 'Abruzzo'
-
-    elif aoi in ['lazio', 'laz']:
-        aoi_tag = 'LAZ'
-        aoi_name = 'Lazio'
-
-    elif aoi in ['umbria', 'umb']:
-        aoi_tag = 'UMB'
-        aoi_name = 'Umbria'
-
-    elif aoi in ['marche', 'mar']:
-        aoi_tag = 'MAR'
-        aoi_name = 'Marche'
-
-    elif aoi in ['emilia_romagna', 'era']:
-        aoi_tag = 'ERA'
-        aoi_name = 'Emilia Romagna'
-
-    elif aoi in ['toscana', 'tos']:
-        aoi_tag = 'TOS'
-        aoi_name = 'Toscana'
-
-    elif aoi in ['lombardia', 'lom']:
-        aoi_tag = 'LOM'
-        aoi_name = 'Lombardia'
-
-    elif aoi in ['piemonte', 'pie']:
-        aoi_tag = 'PIE'
-        aoi_name = 'Piemonte'
-
-    elif aoi in ['sardegna', 'sar']:
-        aoi_tag = 'SAR'
-        aoi_name = 'Sardegna'
-
-    elif aoi in ['trentino', 'taa']:
-        aoi_tag = 'TAA'
-        aoi_name = 'Trentino Alto Adige'
-
-    elif aoi in ['veneto', 'ven']:
-        aoi_tag = 'VEN'
-        aoi_name = 'Veneto'
-
-    elif aoi in ['friuli_venezia_giulia', 'fvg']:
-        aoi_tag = 'FVG'
-        aoi_name = 'Friuli Venezia Giulia'
-
-    elif aoi in ['liguria', 'lig']:
-        aoi_tag = 'LIG'
-        aoi_name = 'Liguria'
-
-    elif aoi in ['valle_d_aosta', 'vda']:
-        aoi_tag = 'VDA'
-        aoi_name = 'Valle d\'Aosta'
-    else:
-
+    try:
+        aoi_tag, aoi_name = _AOI_TABLE[aoi]
+    except KeyError:
         raise ValueError(f"AOI {aoi} not found.")
 
     return {'aoi_tag': aoi_tag, 'aoi_name': aoi_name}
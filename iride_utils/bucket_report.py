@@ -0,0 +1,263 @@
+"""
+Written by Enrico Ciraci' - March 2024
+Shared core of the S3 bucket content reports.
+
+NOTE: This module has been tested only with the first release of IRIDE
+    which is based only on Sentinel-1 data.
+"""
+import re
+from datetime import date
+from functools import lru_cache
+from typing import Iterator, Optional
+
+from iride_utils.aoi_info import get_aoi_info
+from iride_utils.gsp_description import gsp_d_type, gsp_description
+
+SENSOR = 'SNT'    # - Sentinel-1
+# - GSP object key structure:
+# - <sub_dir>/<svc_id>/<sensor>/<start>_<end>/<aoi>/<gsp_id>/.../<prod_id>
+# - the processing field is the fifth element of the product file name.
+GSP_KEY_PATTERN = re.compile(r"^[^/]*/(?P<svc_id>[^/]*)/(?P<sensor>[^/]*)/"
+                             r"(?P<start>\d{6})[^_/]*_(?P<end>\d{6})[^/]*/"
+                             r"(?P<aoi_id>[^/]*)/(?P<gsp_id>[^/]*)/(?:.*/)?"
+                             r"(?:[^_/]*_){4}(?P<processing>[^_/]*)[^/]*$")
+
+
+# - Extensions of the files to skip - e.g. QGIS style files
+SKIP_EXT = frozenset({"DS_Store", "qml", "sld"})
+# - Delivery dates - for this first release use only the 15th of March 2024
+DELIVERY_DATE = date(2024, 3, 15).strftime("%d/%m/%Y")
+# - Scheduled delivery date by service - default: 15th of February 2024
+SCHEDULED_DELIVERY_DATE = {"SE-S3-01": "01/02/2024"}
+DEFAULT_SCHEDULED_DELIVERY_DATE = "15/02/2024"
+# - Report columns
+REPORT_COLUMNS = ["SVC_ID", "GSP_ID", "AOI", "GSP_Path",
+                  "Start_Date", "End_Date", "Sensor",
+                  "Data_Type", "Scheduled_Delivery_Date",
+                  "Delivery_Date", "GSP_Name", "Direction", "Calibrated"]
+
+
+# - GSP direction by service.
+# - Each function receives the processing field and the GSP ID.
+# - NOTE: SE-S3-07 is not included at the moment.
+def _direction_s3_01(processing: str, gsp_id: str) -> str:
+    return processing[3] if gsp_id in _S3_01_DIR_GSP else processing[6]
+
+
+def _direction_s3_02(processing: str, gsp_id: str) -> str:
+    return processing[4] if len(processing) == 5 else processing[6]
+
+
+def _direction_s3_03(processing: str, gsp_id: str) -> str:
+    return processing[9] if len(processing) > 13 else processing[6]
+
+
+def _direction_s3_04(processing: str, gsp_id: str) -> str:
+    return processing[6]
+
+
+def _direction_s3_05(processing: str, gsp_id: str) -> str:
+    return processing[9] if len(processing) >= 11 else processing[6]
+
+
+def _direction_s3_06(processing: str, gsp_id: str) -> str:
+    if len(processing) >= 14:
+        return processing[9]
+    if len(processing) <= 8:
+        return 'NA'
+    return processing[6]
+
+
+def _not_available(processing: str, gsp_id: str) -> str:
+    return 'NA'
+
+
+_S3_01_DIR_GSP = frozenset({f"S3-01-{SENSOR}-03", f"S3-01-{SENSOR}-04"})
+_DIRECTION_DISPATCH = {
+    "SE-S3-01": _direction_s3_01,
+    "SE-S3-02": _direction_s3_02,
+    "SE-S3-03": _direction_s3_03,
+    "SE-S3-04": _direction_s3_04,
+    "SE-S3-05": _direction_s3_05,
+    "SE-S3-06": _direction_s3_06,
+}
+
+
+def get_gsp_direction(processing: str, svc_id: str, gsp_id: str) -> str:
+    """
+    Get the direction of the GSP from the processing string.
+    At the moment, does not include SE-S3-07
+    Args:
+        processing: processing field as a string
+        svc_id: svc id
+        gsp_id: gsp id
+    Returns: Directions value as a string
+    """
+    return _DIRECTION_DISPATCH.get(svc_id, _not_available)(processing,
+                                                           gsp_id)
+
+
+# - GSP calibration flag by service.
+# - Calibration letters included in the processing field
+_CALIB_OC = frozenset("OC")
+_CALIB_MC = frozenset("MC")
+
+
+def _yes_no(flag: bool) -> str:
+    return 'Yes' if flag else 'No'
+
+
+def _calibrated_s3_01(processing: str, gsp_id: str) -> str:
+    return _yes_no(gsp_id in _S3_01_CALIB_GSP)
+
+
+def _calibrated_s3_02(processing: str, gsp_id: str) -> str:
+    return _yes_no(len(processing) == 5 or processing.endswith("C"))
+
+
+def _calibrated_s3_03(processing: str, gsp_id: str) -> str:
+    if len(processing) == 9 or gsp_id == "S3-03-CHA-04":
+        return _yes_no(processing[7] in _CALIB_OC)
+    return _yes_no(processing[10] in _CALIB_OC)
+
+
+def _calibrated_s3_04(processing: str, gsp_id: str) -> str:
+    return 'No'
+
+
+def _calibrated_s3_05(processing: str, gsp_id: str) -> str:
+    calib = processing[7] if len(processing) <= 10 else processing[10]
+    return _yes_no(calib in _CALIB_MC)
+
+
+def _calibrated_s3_06(processing: str, gsp_id: str) -> str:
+    calib = processing[_S3_06_CALIB_INDEX.get(len(processing), 10)]
+    return _yes_no(calib in _CALIB_OC)
+
+
+_S3_01_CALIB_GSP = frozenset({f"S3-01-{SENSOR}-02", f"S3-01-{SENSOR}-03",
+                              f"S3-01-{SENSOR}-04"})
+# - SE-S3-06: processing field length -> calibration letter index
+_S3_06_CALIB_INDEX = {8: 6, 9: 7, 11: 7, 13: 7}
+_CALIBRATED_DISPATCH = {
+    "SE-S3-01": _calibrated_s3_01,
+    "SE-S3-02": _calibrated_s3_02,
+    "SE-S3-03": _calibrated_s3_03,
+    "SE-S3-04": _calibrated_s3_04,
+    "SE-S3-05": _calibrated_s3_05,
+    "SE-S3-06": _calibrated_s3_06,
+    # - SE-S3-07: This operation will need to be updated after the first
+    # - release of this product.
+}
+
+
+def get_calibrated_gsp_id(processing: str, svc_id: str, gsp_id: str) -> str:
+    """
+    Get the calibrated GSP ID
+    Args:
+        processing: processing field as a string
+        svc_id: svc id
+        gsp_id: gsp id
+
+    Returns:
+       Calibration Flag as a string
+    """
+    return _CALIBRATED_DISPATCH.get(svc_id, _not_available)(processing,
+                                                            gsp_id)
+
+
+@lru_cache(maxsize=None)
+def get_aoi_name(aoi_id: str) -> str:
+    """
+    Get the AOI name from the AOI ID included in the object key.
+    Note: the same AOI IDs appear in most of the bucket keys.
+    Args:
+        aoi_id: AOI ID
+
+    Returns:
+        AOI name as a string
+    """
+    return get_aoi_info(aoi_id)['aoi_name']
+
+
+def list_bucket_objects(conn, bucket_name: str,
+                        prefix: str = '') -> Iterator[dict]:
+    """
+    Iterate over the objects stored in an S3 bucket.
+    Note: list_objects returns at most 1000 objects per call, pages are
+        requested one at a time while the caller processes the previous one.
+    Args:
+        conn: boto3 S3 client
+        bucket_name: bucket name
+        prefix: list only the objects whose key begins with this prefix
+
+    Returns:
+        Iterator over the object descriptions returned by S3
+    """
+    paginator = conn.get_paginator('list_objects_v2')
+    for page in paginator.paginate(Bucket=bucket_name, Prefix=prefix):
+        yield from page.get('Contents', ())
+
+
+def gsp_report_row(key_name: str) -> Optional[dict]:
+    """
+    Extract the report information from the key of a GSP object.
+    Args:
+        key_name: S3 object key
+
+    Returns:
+        Report row as a dictionary or None if the object must be skipped
+    Raises:
+        ValueError: if the AOI ID included in the key is not recognized
+    """
+    # - Skip directory placeholders and files with excluded extension
+    if key_name.endswith("/") or key_name.rpartition(".")[2] in SKIP_EXT:
+        return None
+    # - Extract the elements of the key
+    key_match = GSP_KEY_PATTERN.match(key_name)
+    if key_match is None:
+        # - Not a GSP product file
+        return None
+    svc_id = key_match["svc_id"]
+    sensor = key_match["sensor"]
+    aoi_id = key_match["aoi_id"]
+    gsp_id = key_match["gsp_id"]
+    gsp_path = key_name
+
+    # - Reference period start and end dates - DD/MM/YYYY
+    # - Dates are reported on the 15th of the month
+    start_time_str = key_match["start"]
+    start_date = f"15/{start_time_str[4:6]}/{start_time_str[0:4]}"
+    end_date_str = key_match["end"]
+    end_date = f"15/{end_date_str[4:6]}/{end_date_str[0:4]}"
+
+    # - Extract 'Processing' field from the key
+    processing = key_match["processing"]
+
+    # - Get the direction of the GSP
+    d_dir = get_gsp_direction(processing, svc_id, gsp_id)
+    # - Get the calibrated flag
+    calib = get_calibrated_gsp_id(processing, svc_id, gsp_id)
+
+    try:
+        aoi_name = get_aoi_name(aoi_id)
+    except ValueError as err:
+        raise ValueError(f"# - Error: AOI {aoi_id} not recognized") from err
+
+    # - Report row
+    return {
+        "SVC_ID": svc_id,
+        "GSP_ID": gsp_id,
+        "AOI": aoi_name,
+        "GSP_Path": gsp_path,
+        "Start_Date": start_date,
+        "End_Date": end_date,
+        "Sensor": sensor,
+        "Data_Type": gsp_d_type(gsp_id),
+        "Scheduled_Delivery_Date": SCHEDULED_DELIVERY_DATE.get(
+            svc_id, DEFAULT_SCHEDULED_DELIVERY_DATE),
+        "Delivery_Date": DELIVERY_DATE,
+        "GSP_Name": gsp_description(gsp_id),
+        "Direction": d_dir,
+        "Calibrated": calib,
+    }
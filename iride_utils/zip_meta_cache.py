@@ -0,0 +1,33 @@
+"""
+Cache the metadata extracted from the GSP zip archives.
+
+The same archive is often inspected several times during a single run.
+Results are cached by absolute path, modification time, and size so that an
+archive updated on disk is read again.
+"""
+import os
+from functools import lru_cache
+from typing import Dict, List, Optional
+from xml_utils import extract_xml_from_zip
+
+
+@lru_cache(maxsize=4096)
+def _cached_extract(zip_file_path: str, mtime: float,
+                    size: int) -> Optional[List[Dict]]:
+    return extract_xml_from_zip(zip_file_path)
+
+
+def cached_extract_xml_from_zip(zip_file_path: str) -> Optional[List[Dict]]:
+    """
+    Cached version of xml_utils.extract_xml_from_zip.
+    Note: the returned dictionaries are shared between calls and
+        must not be modified.
+    :param zip_file_path: path to the zip file
+    :return: list of python dictionaries
+    """
+    zip_file_path = os.path.abspath(zip_file_path)
+    try:
+        f_stat = os.stat(zip_file_path)
+    except FileNotFoundError:
+        return extract_xml_from_zip(zip_file_path)
+    return _cached_extract(zip_file_path, f_stat.st_mtime, f_stat.st_size)
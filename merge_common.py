@@ -0,0 +1,211 @@
+"""
+Shared utilities used to merge GSP archives relative to a single AOI
+into a single product - see merge_burst.py and merge_tiles.py.
+ - Command line arguments shared by the merge scripts.
+ - Read and concatenate GSP archives and their metadata.
+ - Apply the date columns naming convention.
+ - Add the dataset extent to the output metadata.
+ - Save the merged product and its metadata inside a zip archive.
+
+Python Dependencies:
+    - geopandas: Python tools for working with geospatial data in python
+        https://geopandas.org/
+    - zipfile: Work with zip archives
+    - xml.etree.ElementTree: XML parsing and generation
+"""
+# - Python modules
+import os
+import json
+import math
+import argparse
+import logging
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Tuple
+import xml.etree.ElementTree as ET
+# - External modules
+import geopandas as gpd
+# - Internal modules
+from iride_utils.zip_meta_cache import cached_extract_xml_from_zip
+from read_as_geodataframe import read_as_geodataframe, rename_columns, \
+    concatenate_geodataframes, write_geoparquet, write_csv
+from xml_utils import pretty_xml_string
+
+
+def merge_arg_parser(description: str,
+                     index_help: str) -> argparse.ArgumentParser:
+    """
+    Command line parser with the arguments shared by the merge scripts.
+    Args:
+        description: program description
+        index_help: help message of the index file argument
+    Returns:
+        argparse.ArgumentParser
+    """
+    parser = argparse.ArgumentParser(
+        description=description,
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter
+    )
+    # - index_file: index file generated by index_bursts/index_tiles
+    parser.add_argument('index_file', type=str, help=index_help)
+
+    # - Optional arguments
+    # - Output directory
+    parser.add_argument("-D", "--out_dir", type=str,
+                        default=os.getcwd(),
+                        help='Output directory where '
+                             'the results will be saved.')
+    # - Clip to AOI
+    parser.add_argument("-C", "--clip_aoi", type=str,
+                        default=None,
+                        help='Clip the output to the AOI')
+
+    # - Output file format
+    parser.add_argument("-F", "--format", type=str,
+                        default="parquet", choices=['csv', 'parquet', "shp"],
+                        help='Output format.')
+    return parser
+
+
+def read_gsp_archive(path: Path) -> gpd.GeoDataFrame:
+    """
+    Read a GSP archive as a GeoDataFrame.
+    If latitude and longitude columns are named differently from the
+    standard ones, rename them.
+    Temporary fix for the issue with the GSP provided by TRE-A.
+    Args:
+        path: absolute path to the GSP archive
+    Returns:
+        GeoDataFrame
+    """
+    return rename_columns(read_as_geodataframe(path))
+
+
+def read_gsp_archives(
+        paths: List[Path]) -> Tuple[gpd.GeoDataFrame, List[Dict]]:
+    """
+    Read and concatenate a list of GSP archives and their metadata.
+    Archives are read concurrently, this is an I/O bound operation.
+    Results are returned in the same order as the input paths.
+    Args:
+        paths: absolute paths to the GSP archives
+    Returns:
+        merged GeoDataFrame, metadata dictionary of each archive
+    """
+    with ThreadPoolExecutor() as executor:
+        dataframes_list = list(executor.map(read_gsp_archive, paths))
+        xml_dicts = [xml_dicts[0] for xml_dicts in
+                     executor.map(cached_extract_xml_from_zip,
+                                  map(str, paths))]
+    return concatenate_geodataframes(dataframes_list), xml_dicts
+
+
+def rename_date_columns(gdf: gpd.GeoDataFrame) -> gpd.GeoDataFrame:
+    """
+    Apply the Dates Column Naming Convention - Dyyyymmdd.
+    Specific for the GSP provided by TRE-A.
+    Date columns are matched and renamed in a single pass over the column
+    labels; columns order is preserved.
+    Args:
+        gdf: input GeoDataFrame
+    Returns:
+        GeoDataFrame with renamed columns
+    """
+    columns = gdf.columns
+    dates_cols = columns[columns.str.isdigit()]
+    return gdf.rename(columns=dict(zip(dates_cols, 'D' + dates_cols)))
+
+
+def add_extent_fields(root: ET.Element, gdf: gpd.GeoDataFrame) -> None:
+    """
+    Add the dataset Bounding Box and envelope polygon, both expressed
+    in EPSG:4326 (WGS84), to the XML tree.
+    If the dataset has no valid geometries (e.g. nothing left after
+    clipping), the elements are added with an empty bounding box and a
+    null geometry.
+    Args:
+        root: pointer to the XML tree
+        gdf: merged GeoDataFrame
+    """
+    bbox = ET.SubElement(root, 'bbox')
+    geometry = ET.SubElement(root, 'geometry')
+    # - Only the geometry is needed, convert it to EPSG:4326 (WGS84).
+    # - Note: no transformation is applied if the geometry is
+    # - already in EPSG:4326.
+    geometry_4326 = gdf.geometry.to_crs("EPSG:4326")
+    bounds = geometry_4326.total_bounds.tolist()
+    if not all(map(math.isfinite, bounds)):
+        bbox.text = ""
+        geometry.text = json.dumps(None)
+        return
+    x_min, y_min, x_max, y_max = bounds
+    # - dataset envelope polygon - built from the bounding box,
+    # - no need to compute the union of all the geometries.
+    # - Vertices listed counter-clockwise from the lower-left one.
+    crd = [(x_min, y_min), (x_max, y_min), (x_max, y_max),
+           (x_min, y_max), (x_min, y_min)]
+    env_geometry = {
+        "type": "Polygon",
+        "coordinates": [crd],
+    }
+
+    bbox.text = f"{x_min} {y_min} {x_max} {y_max}"
+    # - Envelope polygon as a GeoJSON geometry - NaN is not valid JSON
+    geometry.text = json.dumps(env_geometry, separators=(',', ':'),
+                               allow_nan=False)
+
+
+def write_merged_product(gdf: gpd.GeoDataFrame, root: ET.Element,
+                         out_dir: str, out_f_name: str,
+                         out_format: str) -> None:
+    """
+    Save the merged product and its metadata inside a zip archive.
+    Metadata and merged data are written directly inside the archive,
+    temporary files are used only for ESRI Shapefiles.
+    Args:
+        gdf: merged GeoDataFrame
+        root: metadata XML tree
+        out_dir: output directory
+        out_f_name: output file name - without extension
+        out_format: output format - parquet, csv, or shp
+    """
+    out_format = out_format.lower()
+    out_file = os.path.join(out_dir, f"{out_f_name}.{out_format}")
+    out_name = os.path.basename(out_file)
+    logging.info(f"# - Saving merged file {out_file}")
+    if out_format == 'shp':
+        # - Covert the Detaframe Geometry to EPSG:4326 (WGS84)
+        # - Shapefiles are written to disk by the OGR driver
+        gdf.to_crs("EPSG:4326").to_file(out_file)
+
+    # - Metadata file
+    metadata_f_name = f"{out_f_name}.xml"
+    logging.info(f"# - Generating metadata file "
+                 f"{os.path.join(out_dir, metadata_f_name)}")
+    # - Indent the xml tree in place, no need to re-parse it
+    pretty_xml = pretty_xml_string(root)
+
+    # - Save results inside a compressed archive
+    zip_name = os.path.join(out_dir, f"{out_f_name}.zip")
+    print(f"# - Creating new zipfile {zip_name}\n")
+    with zipfile.ZipFile(zip_name, 'w') as zip_ref:
+        zip_ref.writestr(metadata_f_name, pretty_xml)
+        if out_format == 'parquet':
+            # - Displacement time series are stored in single
+            # - precision, coordinates are left unchanged.
+            columns = gdf.columns
+            dates_cols = columns[columns.str.fullmatch(r"D\d+")]
+            # - The GeoParquet file is streamed inside the output archive.
+            with zip_ref.open(out_name, 'w', force_zip64=True) as out_f:
+                write_geoparquet(gdf, out_f,
+                                 float32_columns=dates_cols.tolist())
+        elif out_format == 'shp':
+            zip_ref.write(out_file, out_name)
+            # - Remove the temporary file
+            os.remove(out_file)
+        else:
+            # - The CSV file is streamed inside the output archive,
+            # - the 'geometry' column is dropped while writing.
+            with zip_ref.open(out_name, 'w', force_zip64=True) as out_f:
+                write_csv(gdf, out_f)
@@ -24,7 +24,6 @@ Python Dependencise:
         https://numpy.org/
     - zipfile: Work with zip archives
     - xml.etree.ElementTree: XML parsing and generation
-    - xml.dom.minidom: Pretty print xml files
     - typing: Type hints
     - lxml: XML validation against a schema
     - pathlib: Work with file paths
@@ -32,20 +31,16 @@ Python Dependencise:
 """
 # - Python modules
 import os
-import argparse
 import logging
 from datetime import datetime
 from pathlib import Path
-import zipfile
 # - External modules
-import geopandas as gpd
-from xml_utils import extract_xml_from_zip
 from iride_utils.aoi_info import get_aoi_info
 import xml.etree.ElementTree as ET
-from xml.dom.minidom import parseString
 
-from read_as_geodataframe import read_as_geodataframe, rename_columns, \
-    concatenate_geodataframes
+from read_as_geodataframe import read_vector_file, clip_to_aoi
+from merge_common import merge_arg_parser, read_gsp_archives, \
+    rename_date_columns, add_extent_fields, write_merged_product
 
 from iride_utils.gsp_description import gsp_description, gsp_metadata
 from iride_utils.add_meta_field import add_meta_field
@@ -59,33 +54,12 @@ SENSOR = 'SNT'    # - Sentinel-1
 
 def main() -> None:
     # - Parse command line arguments
-    parser = argparse.ArgumentParser(
+    parser = merge_arg_parser(
         description="Merge GSP 2D Deformation Tiles (East-West and Vertical) "
                     "into a single Product.",
-        formatter_class=argparse.ArgumentDefaultsHelpFormatter
+        index_help='Index file containing the list of'
+                   'Tiles available over the AOI.'
     )
-    # - burst_file: Sentinel-1 burst index file file
-    parser.add_argument('index_file', type=str,
-                        help='Index file containing the list of'
-                             'Tiles available over the AOI.')
-
-    # - Optional arguments
-    # - Output directory
-    parser.add_argument("-D", "--out_dir", type=str,
-                        default=os.getcwd(),
-                        help='Output directory where '
-                             'the results will be saved.')
-
-    # - Clip to AOI
-    parser.add_argument("-C", "--clip_aoi", type=str,
-                        default=None,
-                        help='Clip the output to the AOI')
-
-    # - Output file format
-    parser.add_argument("-F", "--format", type=str,
-                        default="csv", choices=['csv', 'parquet', "shp"],
-                        help='Output format.')
-
     args = parser.parse_args()
 
     # - Verify if reference file exists
@@ -100,7 +74,9 @@ def main() -> None:
 
     # - Load the index file
     logging.info(f"# - Loading index file {args.index_file}")
-    gdf = gpd.read_file(args.index_file)
+    # - Read only the index attributes used to merge the products
+    gdf = read_vector_file(args.index_file,
+                           columns=['Path', 'Ortho'])
     # - Remove lines with Path set to None
     gdf = gdf[gdf['Path'] != 'None']
     if gdf.empty:
@@ -109,7 +85,7 @@ def main() -> None:
         return
 
     # - Extract AOI info
-    mask_name = args.index_file.split(os.sep)[-1].replace('.shp', '')
+    mask_name = Path(args.index_file).stem
     aoi_info = get_aoi_info(mask_name)
     # - Update Output Directory
     out_dir = os.path.join(args.out_dir, str(aoi_info['aoi_tag']))
@@ -117,7 +93,7 @@ def main() -> None:
 
     # - Merge Tiles based on the Ortho Values - East-West and Vertical
     # - i.e., Deformation Direction
-    logging.info(f"# - Merging Tiles based on Deformation Direction [V, E]")
+    logging.info("# - Merging Tiles based on Deformation Direction [V, E]")
     for ortho in ['V', 'E']:
         # - Filter Tiles based on the Ortho Value
         gdf_ortho = gdf[gdf['Ortho'] == ortho]
@@ -125,109 +101,43 @@ def main() -> None:
             logging.error(f"# - No Tiles found for Ortho {ortho}")
             continue
 
-        # - Merge Tiles
-        # - Load the first tile
-        ft_path = Path(gdf_ortho.iloc[0]['Path'])
-        gdf_tiles = read_as_geodataframe(ft_path)
+        # - Tile archives
+        tile_paths = [Path(p) for p in gdf_ortho['Path']]
+        tile_stems = [p.stem for p in tile_paths]
 
-        # - If latitude and longitude columns are named
-        # - differently from the standard ones, rename them.
-        # - Temporary fix for the issue with the GSP provided by TRE-A.
-        gdf_tiles = rename_columns(gdf_tiles)
+        # - Read all the tiles and their metadata and merge them.
+        gdf_tiles, tile_xml_dicts = read_gsp_archives(tile_paths)
 
-        # - Extract Metadata from the first burst archive
-        xml_dicts_ref = extract_xml_from_zip(str(ft_path))[0]
+        # - First tile - reference for the output metadata
+        xml_dicts_ref = tile_xml_dicts[0]
         # - Extract fields from the metadata
         in_prod_id = xml_dicts_ref['product_id']
         in_prod_id_ns = xml_dicts_ref['product_id'].replace('-', '')
-        in_start_date = str(ft_path.stem).split('_')[2]
-        in_end_date = str(ft_path.stem).split('_')[3]
+        ft_name_fields = tile_stems[0].split('_')
+        in_start_date = ft_name_fields[2]
+        in_end_date = ft_name_fields[3]
         provider_ref = xml_dicts_ref['provider']
 
-        # - Loop over the remaining bursts and merge them
-        dataframes_list = []
-        for idx in range(0, len(gdf_ortho)):
-            tile_path = Path(gdf_ortho.iloc[idx]['Path'])
-            df_to_append = rename_columns(read_as_geodataframe(tile_path))
-            dataframes_list.append(df_to_append)
-
-        gdf_tiles = concatenate_geodataframes(dataframes_list)
-
         # - Remove duplicates based on Longitude and Latitude coordinates
         gdf_tiles = gdf_tiles.drop_duplicates(subset=['easting', 'northing'])
 
         # - Clip the output to the AOI
         if args.clip_aoi is not None:
-            logging.info(f"# - Clipping the output to the AOI.")
+            logging.info("# - Clipping the output to the AOI.")
             # - Load the AOI
-            aoi_gdf = gpd.read_file(args.clip_aoi).to_crs(gdf_tiles.crs)
+            aoi_gdf = read_vector_file(args.clip_aoi, columns=[])
+            aoi_gdf = aoi_gdf.to_crs(gdf_tiles.crs)
             # - Clip the output to the AOI
-            gdf_tiles = gdf_tiles.clip(aoi_gdf)
+            gdf_tiles = clip_to_aoi(gdf_tiles, aoi_gdf)
 
         print(f"# - Number of bursts merged: {len(gdf_tiles)}")
 
         # - Add another operation specific for the GSP provided by TRE-A.
-        col_names = []
-        for col in gdf_tiles.columns:
-            if col.isdigit():
-                gdf_tiles \
-                    = gdf_tiles.rename(columns={col: 'D' + col},
-                                       inplace=True)
-                col_names.append('D' + col)
-            else:
-                col_names.append(col)
-        # - Make sure that the output dataframe has the same columns order
-        # - as the first one.
-        gdf_tiles = gdf_tiles[col_names]
+        gdf_tiles = rename_date_columns(gdf_tiles)
 
         # - Output File Name
         out_f_name = (f"ISS_{in_prod_id_ns}_{in_start_date}"
                       f"_{in_end_date}_{aoi_info['aoi_tag']}O{ortho}_01")
-        out_file = os.path.join(out_dir, out_f_name + '.csv')
-        logging.info(f"# - Saving merged file {out_file}")
-
-        if args.format.lower() == 'parquet':
-            out_file = os.path.join(out_dir, out_f_name + '.parquet')
-            gdf_tiles.to_parquet(out_file, index=False)
-        elif args.format.lower() == 'shp':
-            out_file = os.path.join(out_dir, out_f_name + '.shp')
-            # - Covert the Detaframe Geometry to EPSG:4326 (WGS84)
-            gdf_tiles = gdf_tiles.to_crs("EPSG:4326")
-            gdf_tiles.to_file(out_file)
-        else:
-            # - If the output format is csv, remove the geometry column
-            out_file = os.path.join(out_dir, out_f_name + '.csv')
-            # - in this case remove the 'geometry' column
-            if 'geometry' in gdf_tiles.columns:
-                gdf_tiles_ts = gdf_tiles.drop(columns='geometry', axis=1)
-                gdf_tiles_ts.to_csv(out_file, index=False)
-            else:
-                gdf_tiles.to_csv(out_file, index=False)
-
-        # - Covert the Detaframe Geometry to EPSG:4326 (WGS84)
-        gdf_tiles = gdf_tiles.to_crs("EPSG:4326")
-
-        # - Generate the metadata file
-        metadata_f_name = (f"ISS_{in_prod_id_ns}_{in_start_date}"
-                           f"_{in_end_date}_{aoi_info['aoi_tag']}"
-                           f"O{ortho}_01.xml")
-        metadata_file = os.path.join(out_dir, metadata_f_name)
-        logging.info(f"# - Generating metadata file {metadata_file}")
-
-        # - Extract Bounding Box and Perimeter
-        x_min, y_min, x_max, y_max = gdf_tiles.total_bounds
-        # - extract dataset envelope polygon
-        envelope \
-            = gpd.GeoSeries([gdf_tiles.unary_union.envelope],
-                            crs=gdf_tiles.crs).iloc[0].exterior.coords.xy
-        xs = envelope[0]
-        ys = envelope[1]
-        crd = list(zip(xs, ys))
-
-        env_geometry = {
-            "type": "Polygon",
-            "coordinates": [crd],
-        }
 
         # - Add XML File
         # - Create the root element
@@ -237,7 +147,7 @@ def main() -> None:
         gsp_id = ET.SubElement(root, 'gsp_id')
         gsp_id.text = in_prod_id
         product_id = ET.SubElement(root, 'product_id')
-        product_id.text = out_f_name.replace('.csv', '')
+        product_id.text = out_f_name
         description = ET.SubElement(root, 'description')
         description.text = gsp_description(in_prod_id)
 
@@ -263,10 +173,7 @@ def main() -> None:
         aoi.text = aoi_info['aoi_tag']
 
         # - Add Bounding Box and Perimeter
-        bbox = ET.SubElement(root, 'bbox')
-        bbox.text = f"{x_min} {y_min} {x_max} {y_max}"
-        geometry = ET.SubElement(root, 'geometry')
-        geometry.text = str(env_geometry)
+        add_extent_fields(root, gdf_tiles)
 
         # - Add CRS
         crs = ET.SubElement(root, 'crs')
@@ -280,22 +187,20 @@ def main() -> None:
         for md in meta_data:
             add_meta_field(dataset, md)
 
-        # - Loop over the remaining bursts and merge them
-        for idx in range(len(gdf_ortho)):
-            meta_path = Path(gdf_ortho.iloc[idx]['Path'])
-            xml_dict_gsp = extract_xml_from_zip(str(meta_path))[0]
-            product_id_in = str(meta_path.stem)
+        # - 2D Deformation East-West and Vertical Components
+        # - Input ID is Fixed in this case
+        gsp_id_in = 'S301SNT03'
+        gsp_desc_in = gsp_description(gsp_id_in)
 
+        # - Loop over the merged tiles
+        for product_id_in, xml_dict_gsp in zip(tile_stems, tile_xml_dicts):
             # - Extract Geospatial Product ID
             gsp = ET.SubElement(dataset, 'gsp')
             gsp_id = ET.SubElement(gsp, 'gsp_id')
-            # - 2D Deformation East-West and Vertical Components
-            # - Input ID is Fixed in this case
-            gsp_id_in = 'S301SNT03'
             gsp_id.text = gsp_id_in
 
             # - Extract Product ID - input file name
-            p_f_name = str(Path(gdf_ortho.iloc[idx]['Path']).stem).split('_')
+            p_f_name = product_id_in.split('_')
 
             # - Convert the input file name to the original
             # - one produced by SVC01
@@ -309,27 +214,12 @@ def main() -> None:
             tile_id.text = xml_dict_gsp['tile_id']
 
             description = ET.SubElement(gsp, 'description')
-            description.text = gsp_description(gsp_id_in)
-
-        # - Save Formatted XML to File
-        xml_string = ET.tostring(root, encoding='utf-8', method='xml')
-        # - Use minidom to prettify the xml string
-        dom = parseString(xml_string)
-        pretty_xml = dom.toprettyxml()
-        # - Write the pretty xml string to file
-        with open(metadata_file, 'w') as f:
-            f.write(pretty_xml)
-
-        # - Save results inside a compressed archive
-        zip_name = metadata_file.replace('.xml', '.zip')
-        # - Create a new zipfile
-        print(f"# - Creating new zipfile {zip_name}\n")
-        with zipfile.ZipFile(zip_name, 'w') as zip_ref:
-            zip_ref.write(metadata_file, metadata_f_name)
-            zip_ref.write(out_file, os.path.basename(out_file))
-        # - Remove the temporary files
-        os.remove(metadata_file)
-        os.remove(out_file)
+            description.text = gsp_desc_in
+
+        # - Save the merged product and its metadata
+        # - inside a compressed archive.
+        write_merged_product(gdf_tiles, root, out_dir, out_f_name,
+                             args.format)
 
 
 if __name__ == "__main__":
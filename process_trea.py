@@ -6,8 +6,61 @@ zipfile without the original zip file directory structure.
 # - Python modules
 import os
 import argparse
+import posixpath
 import shutil
 import zipfile
+from concurrent.futures import ThreadPoolExecutor
+
+
+def process_zip_file(z_file: str, out_dir: str) -> None:
+    """
+    Save the files relative to the considered product to a new zipfile
+    without the original zip file directory structure.
+    Members are copied between the two archives without being extracted
+    to disk.
+    Args:
+        z_file: absolute path to the input zip file
+        out_dir: output directory
+    """
+    print(f"# - Reading file {z_file}")
+    z_file_base = os.path.basename(z_file).replace('.zip', '')
+    # - Move the product files to the base directory of the archive
+    # - This is a temporary fix for TRE-A data.
+    product_dir = 'data/IRIDE/S3-02-SNT-05'
+
+    # - Create a new zipfile
+    # - The archive is written to a temporary file and moved to its final
+    # - path only once the input archive is closed: the output path can
+    # - be the input file itself (e.g. out_dir equal to the input dir).
+    out_file = os.path.join(out_dir, f"{z_file_base}.zip")
+    print(f"# - Creating new zipfile {z_file_base}.zip")
+    tmp_file = f"{out_file}.tmp"
+    try:
+        with zipfile.ZipFile(z_file, 'r') as src_ref, \
+                zipfile.ZipFile(tmp_file, 'w') as zip_ref:
+            # - List the archive content
+            # - Select the product files in a single pass
+            ftm_list = [z_info for z_info in src_ref.infolist()
+                        if z_info.filename.endswith(('.xml', '.csv'))
+                        and posixpath.dirname(z_info.filename) == product_dir
+                        and z_file_base in z_info.filename]
+            # -  Loop through all files in the list
+            for z_info in ftm_list:
+                # - Add the file to the zip file - same timestamp and
+                # - attributes, no directory structure.
+                out_info = zipfile.ZipInfo(
+                    posixpath.basename(z_info.filename),
+                    date_time=z_info.date_time)
+                out_info.external_attr = z_info.external_attr
+                out_info.file_size = z_info.file_size
+                with src_ref.open(z_info) as src_f, \
+                        zip_ref.open(out_info, 'w') as out_f:
+                    shutil.copyfileobj(src_f, out_f, 1 << 20)
+        os.replace(tmp_file, out_file)
+    except BaseException:
+        if os.path.exists(tmp_file):
+            os.remove(tmp_file)
+        raise
 
 
 def main() -> None:
@@ -40,39 +93,13 @@ def main() -> None:
         print(f"# - Created output directory {args.out_dir}")
 
     # - Loop over the files in the input directory
-    z_file_list = [os.path.join(args.in_dir, f)
-                   for f in os.listdir(args.in_dir) if f.endswith('.zip')]
-    for z_file in z_file_list:
-        print(f"# - Reading file {z_file}")
-        with zipfile.ZipFile(z_file, 'r') as zip_ref:
-            # - Extract all files to the current directory
-            print(f"# - Extracting files from {z_file}")
-            zip_ref.extractall(args.out_dir)
-
-        # - Move the extracted file tho the base directory
-        # - This is a temporary fix for TRE-A data.
-        temporary_dir\
-            = os.path.join(args.out_dir, 'data', 'IRIDE', 'S3-02-SNT-05')
-        # - List temporary directory content
-        z_file_base = os.path.basename(z_file).replace('.zip', '')
-        ftm_list = [os.path.join(temporary_dir, f)
-                    for f in os.listdir(temporary_dir)
-                    if f.endswith('.xml') or f.endswith('.csv')]
-        ftm_list = filter(lambda x: z_file_base in x, ftm_list)
-
-        # - Define directory file name
-        file_name = os.path.basename(z_file).replace('.zip', '')
-        # - Create a new zipfile
-        print(f"# - Creating new zipfile {file_name}.zip")
-        with zipfile.ZipFile(os.path.join(args.out_dir, f"{file_name}.zip"),
-                             'w') as zip_ref:
-            # -  Loop through all files in the list
-            for file_name in ftm_list:
-                # Add the file to the zip file
-                zip_ref.write(file_name, os.path.basename(file_name))
-
-    # - Remove the temporary directory
-    shutil.rmtree(os.path.join(args.out_dir, 'data'))
+    with os.scandir(args.in_dir) as dir_entries:
+        z_file_list = [entry.path for entry in dir_entries
+                       if entry.name.endswith('.zip') and entry.is_file()]
+    # - Zip files are independent, process them concurrently.
+    with ThreadPoolExecutor(max_workers=os.cpu_count()) as executor:
+        list(executor.map(process_zip_file, z_file_list,
+                          [args.out_dir] * len(z_file_list)))
 
 
 if __name__ == "__main__":
@@ -4,59 +4,177 @@ Written by: Filippo Santarelli - February 2024
 Utility functions to work with geospatial data.
  - Convert a CSV file to a GeoDataFrame.
  - Convert a file provided in csv, shp, and zip  to a GeoDataFrame.
+ - Read a vector file (e.g. ESRI Shapefile) as a GeoDataFrame.
+ - Write a GeoDataFrame to a vector file.
+ - Write a GeoDataFrame to a GeoParquet file.
+ - Write a DataFrame to a CSV file without the geometry column.
+ - Concatenate GeoDataFrames that do not contain the same columns.
+ - Clip a GeoDataFrame to an area of interest.
 """
 # - Python Dependencies:
 from pathlib import Path
+import io
 import logging
 import zipfile
-from typing import Optional
-import fsspec
+from typing import Optional, List, Sequence, BinaryIO
 import geopandas as gpd
 import pandas as pd
+import pyarrow as pa
+import pyarrow.csv as pa_csv
+import shapely
 
+# - Supported vector output formats: format -> (OGR driver, file extension)
+VECTOR_FORMATS = {
+    'fgb': ('FlatGeobuf', '.fgb'),
+    'gpkg': ('GPKG', '.gpkg'),
+    'shp': ('ESRI Shapefile', '.shp'),
+}
 
-def read_dset_from_zip(zip_path: Path, **kwargs) -> pd.DataFrame:
+# - Strings interpreted as missing values by the Arrow CSV reader.
+# - Same set used by default by pandas.read_csv.
+CSV_NULL_VALUES = ['', '#N/A', '#N/A N/A', '#NA', '-1.#IND', '-1.#QNAN',
+                   '-NaN', '-nan', '1.#IND', '1.#QNAN', '<NA>', 'N/A', 'NA',
+                   'NULL', 'NaN', 'None', 'n/a', 'nan', 'null']
+
+
+def read_dset_from_zip(zip_path: Path,
+                       columns: Optional[List[str]] = None,
+                       **kwargs) -> pd.DataFrame:
     """
     Read a dataset from a ZIP file.
     Works only for zip files containing .csv and .zip files.
     Args:
         zip_path: absolute path to the ZIP file
+        columns: columns to read - all columns if None
         **kwargs:
     Returns:
         GeoDataFrame
     """
+    zip_path = Path(zip_path)
     with zipfile.ZipFile(zip_path, 'r') as zipf:
         zip_names = zipf.namelist()
+        csv_name = zip_path.with_suffix(".csv").name
+        if csv_name in zip_names:
+            # - CSV files are parsed sequentially, stream the member
+            # - without extracting it.
+            with zipf.open(csv_name) as csv_file:
+                return read_csv_as_geodataframe(csv_file, columns=columns,
+                                                **kwargs)
+        # - Parquet files need random access (metadata are stored in the
+        # - file footer). Seeking inside a compressed member restarts the
+        # - decompression, so read the member in memory once.
+        pq_name = next((n for n in zip_names if n.endswith(".parquet")),
+                       None)
+        if pq_name is None:
+            raise FileNotFoundError(f"No .csv or .parquet file found "
+                                    f"in {zip_path}")
+        return gpd.read_parquet(io.BytesIO(zipf.read(pq_name)),
+                                columns=columns)
 
-    zip_path = Path(zip_path)
-    if zip_path.with_suffix(".csv").name in zip_names:
-        with fsspec.open("zip://*.csv::" + zip_path.as_posix()) as of:
-            return read_csv_as_geodataframe(of, **kwargs)
-    else:
-        with (fsspec.open("zip://*.parquet::"
-                          + zip_path.as_posix()) as of):
-            return gpd.read_parquet(of)
 
+def _arrow_type(dtype) -> pa.DataType:
+    """
+    Arrow type used to parse a column requested with a pandas dtype.
+    Types without an Arrow equivalent (e.g. category) are parsed as
+    strings and converted by pandas.
+    """
+    dtype = pd.api.types.pandas_dtype(dtype)
+    if isinstance(dtype, pd.StringDtype) or dtype == object:
+        return pa.string()
+    try:
+        return pa.from_numpy_dtype(dtype)
+    except (TypeError, NotImplementedError, pa.ArrowNotImplementedError):
+        return pa.string()
 
-def read_csv_as_geodataframe(path: Path, **kwargs) -> gpd.GeoDataFrame:
+
+def _read_arrow_csv(path, delimiter: str,
+                    convert_options: pa_csv.ConvertOptions) -> pa.Table:
+    """
+    Read a CSV file as an Arrow Table - blocks are parsed in parallel.
+    """
+    return pa_csv.read_csv(
+        path, read_options=pa_csv.ReadOptions(block_size=8 << 20),
+        parse_options=pa_csv.ParseOptions(delimiter=delimiter),
+        convert_options=convert_options)
+
+
+def read_csv_as_geodataframe(path: Path,
+                             columns: Optional[List[str]] = None,
+                             **kwargs) -> gpd.GeoDataFrame:
     """
     Read a CSV file as a GeoDataFrame
     :param path: absolute path to the file
+    :param columns: columns to read - all columns if None.
+        The `easting` and `northing` fields are always read; use an
+        empty list to read the coordinates only.
     :param kwargs: dictionary of parameters passed to the read_csv method
     :return: gpd.GeoDataFrame
+
+    Note:
+        The file is parsed in parallel by the Arrow CSV reader; pandas is
+        used only when read_csv parameters other than the field delimiter
+        and a per-column `dtype` dictionary are passed. With the Arrow
+        reader, selected columns are returned in the order listed in
+        `columns`. Columns listed in `dtype` are parsed directly with
+        the requested type, skipping type inference.
     """
-    df = pd.read_csv(path, **kwargs)
-    return gpd.GeoDataFrame(
-        data=df,
-        geometry=gpd.points_from_xy(df.easting, df.northing, crs=3035),
-        crs=3035,
-    )
+    delimiter = kwargs.pop('delimiter', kwargs.pop('sep', ','))
+    dtype = kwargs.pop('dtype', None)
+    if columns is not None:
+        columns = list(dict.fromkeys([*columns, 'easting', 'northing']))
+    if kwargs or not isinstance(dtype, (dict, type(None))):
+        df = pd.read_csv(path, sep=delimiter, usecols=columns, dtype=dtype,
+                         **kwargs)
+    else:
+        dtype = dtype or {}
+        column_types = {col: _arrow_type(col_type)
+                        for col, col_type in dtype.items()}
+        convert_options = pa_csv.ConvertOptions(
+            include_columns=columns or [], column_types=column_types,
+            null_values=CSV_NULL_VALUES, strings_can_be_null=True)
+        table = _read_arrow_csv(path, delimiter, convert_options)
+        # - Dates and times are kept as strings, as done by
+        # - pandas.read_csv: read them again as strings if found.
+        temporal_cols = {f.name: pa.string() for f in table.schema
+                         if pa.types.is_temporal(f.type)
+                         and f.name not in column_types}
+        if temporal_cols:
+            if hasattr(path, 'seek'):
+                path.seek(0)
+            convert_options.column_types = {**column_types, **temporal_cols}
+            table = _read_arrow_csv(path, delimiter, convert_options)
+        df = table.to_pandas()
+        # - Apply the requested pandas dtypes (e.g. category, string)
+        dtype = {col: col_type for col, col_type in dtype.items()
+                 if col in df.columns}
+        if dtype:
+            df = df.astype(dtype)
+    # - Points are built in a single vectorized GEOS call (shapely >= 2.0)
+    # - directly from the coordinates arrays.
+    geometry = shapely.points(df['easting'].to_numpy(dtype='float64'),
+                              df['northing'].to_numpy(dtype='float64'))
+    return gpd.GeoDataFrame(data=df, geometry=geometry, crs=3035)
+
+
+def _to_epsg_3035(gdf: gpd.GeoDataFrame) -> gpd.GeoDataFrame:
+    """
+    Convert a GeoDataFrame to EPSG:3035 - ETRS89-extended / LAEA Europe.
+    GeoDataFrames already in EPSG:3035 are returned as they are, without
+    copying them.
+    """
+    if gdf.crs == "EPSG:3035":
+        return gdf
+    return gdf.to_crs(3035)
 
 
-def read_as_geodataframe(path: Path, **kwargs) -> Optional[gpd.GeoDataFrame]:
+def read_as_geodataframe(path: Path, columns: Optional[List[str]] = None,
+                         **kwargs) -> Optional[gpd.GeoDataFrame]:
     """
     Read a file as a GeoDataFrame
     :param path: absolute path to the file
+    :param columns: columns to read - all columns if None.
+        Use the column names of the input file; for parquet files the
+        list must include the geometry column.
     :param kwargs: dictionary of parameters passed to the read_csv method
     :return: gpd.GeoDataFrame or None if file extension is not recognised
 
@@ -72,16 +190,18 @@ def read_as_geodataframe(path: Path, **kwargs) -> Optional[gpd.GeoDataFrame]:
     try:
         match path.suffix:
             case ".zip":
-                return read_dset_from_zip(path, **kwargs).to_crs(3035)
+                return _to_epsg_3035(read_dset_from_zip(path, columns=columns,
+                                                        **kwargs))
             case ".csv":
-                return read_csv_as_geodataframe(path, **kwargs)
+                return read_csv_as_geodataframe(path, columns=columns,
+                                                **kwargs)
             case ".shp":
-                df = gpd.read_file(Path(path))
+                df = read_vector_file(path, columns=columns)
                 df.crs = 4326
                 return df.to_crs(3035)
             case ".parquet":
-                df = gpd.read_parquet(Path(path))
-                return df.to_crs(3035)
+                df = gpd.read_parquet(Path(path), columns=columns)
+                return _to_epsg_3035(df)
             case _:
                 logging.error(f"File extension {path.suffix} not recognised")
                 return None
@@ -90,6 +210,143 @@ def read_as_geodataframe(path: Path, **kwargs) -> Optional[gpd.GeoDataFrame]:
         return None
 
 
+def read_vector_file(path: str | Path,
+                     columns: Optional[List[str]] = None) -> gpd.GeoDataFrame:
+    """
+    Read a vector file (e.g. ESRI Shapefile) as a GeoDataFrame.
+    Use the pyogrio engine if available, fiona otherwise. With pyogrio,
+    features are read in Arrow batches - no Python object per feature.
+    Args:
+        path: absolute path to the file
+        columns: attribute columns to read - all columns if None
+    Returns:
+        GeoDataFrame
+    """
+    try:
+        return gpd.read_file(path, engine="pyogrio", use_arrow=True,
+                             columns=columns)
+    except ImportError:
+        return gpd.read_file(path, columns=columns)
+
+
+def write_vector_file(gdf: gpd.GeoDataFrame, path: str | Path,
+                      driver: str) -> None:
+    """
+    Write a GeoDataFrame to a vector file.
+    Use the pyogrio engine if available, fiona otherwise.
+    Args:
+        gdf: GeoDataFrame to save
+        path: absolute path to the output file
+        driver: OGR driver name - e.g. FlatGeobuf, GPKG, ESRI Shapefile
+    Note:
+        FlatGeobuf files are written without spatial index: the index
+        sorts the features along a Hilbert curve, while the rows order
+        of the input GeoDataFrame is kept in the output file.
+    """
+    # - Layer creation options
+    layer_options = {}
+    if driver == "FlatGeobuf":
+        layer_options["SPATIAL_INDEX"] = "NO"
+    try:
+        gdf.to_file(path, driver=driver, engine="pyogrio", **layer_options)
+    except ImportError:
+        gdf.to_file(path, driver=driver, **layer_options)
+
+
+def write_geoparquet(gdf: gpd.GeoDataFrame,
+                     path: str | Path | BinaryIO,
+                     float32_columns: Optional[List[str]] = None) -> None:
+    """
+    Write a GeoDataFrame to a snappy compressed GeoParquet file.
+    Geometries are stored with the native GeoArrow encoding. WKB is used
+    for the datasets GeoArrow cannot represent: empty datasets, mixed
+    geometry types and geometry collections.
+    Args:
+        gdf: GeoDataFrame to save
+        path: absolute path to the output file or binary file-like object
+        float32_columns: floating point columns stored in single precision
+            with the BYTE_STREAM_SPLIT encoding - e.g. displacement time
+            series. Other columns are saved unchanged.
+    """
+    kwargs = {}
+    float32_columns = [c for c in float32_columns or []
+                       if gdf[c].dtype.kind == 'f']
+    if float32_columns:
+        gdf = gdf.astype(dict.fromkeys(float32_columns, 'float32'))
+        # - Dictionary encoding takes precedence over BYTE_STREAM_SPLIT,
+        # - use it only for the remaining columns.
+        kwargs['use_byte_stream_split'] = float32_columns
+        kwargs['use_dictionary'] \
+            = gdf.columns.drop(float32_columns).tolist()
+    # - GeoArrow stores a single geometry type (and its Multi version)
+    geom_types = set(gdf.geom_type.dropna().str.removeprefix('Multi'))
+    if len(geom_types) == 1 and 'GeometryCollection' not in geom_types:
+        geometry_encoding = 'geoarrow'
+    else:
+        geometry_encoding = 'WKB'
+    gdf.to_parquet(path, index=False, compression='snappy',
+                   geometry_encoding=geometry_encoding, **kwargs)
+
+
+def write_csv(df: pd.DataFrame, f: BinaryIO,
+              drop_columns: Sequence[str] = ('geometry',),
+              chunksize: int = 100_000) -> None:
+    """
+    Write a DataFrame to a binary file object as a UTF-8 CSV file.
+    Rows are written in chunks: the columns to drop (e.g. the geometry)
+    are removed from one chunk at a time, the full DataFrame is never
+    copied.
+    Args:
+        df: DataFrame to save
+        f: binary file object - e.g. a zip archive member
+        drop_columns: columns not written to the CSV file
+        chunksize: number of rows written at a time
+    """
+    columns = df.columns.drop(list(drop_columns), errors='ignore')
+    with io.TextIOWrapper(f, encoding='utf-8', newline='') as text_f:
+        # - Write at least one chunk, the header, for empty DataFrames
+        for start in range(0, max(len(df), 1), chunksize):
+            df.iloc[start:start + chunksize][columns].to_csv(
+                text_f, index=False, header=(start == 0))
+
+
+def concatenate_geodataframes(
+        gdf_list: List[gpd.GeoDataFrame]) -> gpd.GeoDataFrame:
+    """
+    Concatenate GeoDataFrames that do not contain exactly the same columns.
+    Columns missing from an input are filled with NaN and the CRS of the
+    inputs is kept.
+    Args:
+        gdf_list: list of GeoDataFrames with the same geometry column and CRS
+    Returns:
+        GeoDataFrame
+    """
+    return pd.concat(gdf_list, ignore_index=True)
+
+
+def clip_to_aoi(gdf: gpd.GeoDataFrame,
+                aoi_gdf: gpd.GeoDataFrame) -> gpd.GeoDataFrame:
+    """
+    Clip a GeoDataFrame to the area of interest.
+    Point datasets are filtered with a vectorized point-in-polygon test
+    against the prepared AOI geometry, no spatial index is built over
+    the points. Other geometries are clipped with GeoDataFrame.clip.
+    Args:
+        gdf: GeoDataFrame to clip
+        aoi_gdf: area of interest - same CRS as gdf
+    Returns:
+        GeoDataFrame - points keep the input order
+    """
+    geometry = gdf.geometry.values
+    if not (shapely.get_type_id(geometry) == 0).all():
+        # - Not a point dataset
+        return gdf.clip(aoi_gdf)
+    aoi_geometry = aoi_gdf.geometry.union_all()
+    shapely.prepare(aoi_geometry)
+    # - Points on the AOI boundary are kept, as done by clip
+    return gdf[shapely.intersects(aoi_geometry, geometry)]
+
+
 def rename_columns(gdf: gpd.GeoDataFrame) -> gpd.GeoDataFrame:
     """
     Rename columns in the GeoDataFrame to match the standard ones.
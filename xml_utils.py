@@ -5,29 +5,42 @@ Utility functions to work with xml files.
 Python Dependencies:
 - zipfile: Work with zip archives
 - xml.etree.ElementTree: XML parsing and generation
-- xml.dom.minidom: Pretty print xml files
 - typing: Type hints
-- lxml: XML validation against a schema
+- lxml: XML parsing and validation against a schema
 - pathlib: Work with file paths
 """
+import os
 import zipfile
+from functools import lru_cache
 import xml.etree.ElementTree as ET
 from xml.etree.ElementTree import Element, SubElement, tostring
-from xml.dom.minidom import parseString
 from lxml import etree
 from typing import Union, Dict, List
 from pathlib import Path
 
 
-def xml_to_dict(element: ET.Element) -> Union[Dict, str]:
+def xml_to_dict(element: ET.Element | etree._Element) -> Union[Dict, str]:
     """
     Convert a xml string to a dictionary
-    :param element: ET.Element
+    :param element: ET.Element or lxml element
     :return: python dictionary
     """
     if len(element) == 0:  # if the element has no children
         return element.text
-    return {child.tag: xml_to_dict(child) for child in element}
+    # - Walk the tree with an explicit stack instead of recursion.
+    # - Children are added in document order: if a tag is repeated,
+    # - the last element wins.
+    xml_dict = {}
+    stack = [(element, xml_dict)]
+    while stack:
+        node, node_dict = stack.pop()
+        for child in node:
+            if len(child) == 0:
+                node_dict[child.tag] = child.text
+            else:
+                child_dict = node_dict[child.tag] = {}
+                stack.append((child, child_dict))
+    return xml_dict
 
 
 def extract_xml_from_zip(zip_file_path: str) -> List[Dict]:
@@ -38,16 +51,20 @@ def extract_xml_from_zip(zip_file_path: str) -> List[Dict]:
     :param zip_file_path: absolute path to the zip file
     :return: list of python dictionaries
     """
+    # - Parse with lxml (libxml2). Comments and processing instructions
+    # - are discarded, as done by xml.etree.ElementTree.
+    # - Note: lxml parsers can not be shared between threads.
+    parser = etree.XMLParser(remove_comments=True, remove_pis=True)
     try:
         with zipfile.ZipFile(zip_file_path, 'r') as zipf:
             xml_dicts = []
             for filename in zipf.namelist():
                 if filename.endswith('.xml'):
+                    # - Parse the member while it is decompressed,
+                    # - without reading it in memory first.
                     with zipf.open(filename) as xml_file:
-                        xml_string = xml_file.read().decode('utf-8')
-                        root = ET.fromstring(xml_string)
-                        xml_dict = xml_to_dict(root)
-                        xml_dicts.append(xml_dict)
+                        root = etree.parse(xml_file, parser).getroot()
+                    xml_dicts.append(xml_to_dict(root))
             return xml_dicts
     except zipfile.BadZipFile:
         print(f"Error: The file {zip_file_path} is not a zip "
@@ -56,6 +73,21 @@ def extract_xml_from_zip(zip_file_path: str) -> List[Dict]:
         print(f"Error: The file {zip_file_path} does not exist.")
 
 
+def pretty_xml_string(root: ET.Element, indent: str = '\t') -> str:
+    """
+    Serialize a xml tree to an indented string.
+    The layout matches the one produced by xml.dom.minidom toprettyxml,
+    without re-parsing the serialized tree.
+    Note: the input tree is indented in place.
+    :param root: root element of the xml tree
+    :param indent: string used for each indentation level
+    :return: pretty printed xml string
+    """
+    ET.indent(root, space=indent)
+    return ('<?xml version="1.0" ?>\n'
+            + tostring(root, encoding='unicode') + '\n')
+
+
 def dict_to_xml(input_dict: Dict, filename: str) -> None:
     """
     Convert a dictionary to an xml file
@@ -77,21 +109,42 @@ def dict_to_xml(input_dict: Dict, filename: str) -> None:
     # Convert the dictionary to xml elements
     dict_to_elem(root, input_dict)
 
-    # Create a string from the xml elements
-    xml_string = tostring(root, 'utf-8')
+    # Indent the xml tree in place and write the pretty printed xml to file
+    with open(filename, 'w') as xml_file:
+        xml_file.write(pretty_xml_string(root, indent="  "))
 
-    # Parse the xml string with minidom to pretty print the xml
-    parsed_xml = parseString(xml_string)
 
-    # Write the pretty printed xml to file
-    with open(filename, 'w') as xml_file:
-        xml_file.write(parsed_xml.toprettyxml(indent="  "))
+@lru_cache(maxsize=8)
+def _cached_schema(xsd_path: str, mtime: float,
+                   size: int) -> etree.XMLSchema:
+    return etree.XMLSchema(etree.parse(xsd_path))
+
+
+def get_xml_schema(xsd_input: str | Path) -> etree.XMLSchema:
+    """
+    Parse a XSD schema file.
+    Parsed schemas are cached by absolute path, modification time, and
+    size so that a schema updated on disk is parsed again.
+    :param xsd_input: path to the XSD schema file
+    :return: lxml XMLSchema object
+    """
+    xsd_path = os.path.abspath(xsd_input)
+    f_stat = os.stat(xsd_path)
+    return _cached_schema(xsd_path, f_stat.st_mtime, f_stat.st_size)
 
 
 def validate_xml_against_schema(xml_input: str | Path,
-                                xsd_input: str | Path) -> None:
-    xsd_tree = etree.parse(xsd_input)
-    xsd_schema = etree.XMLSchema(xsd_tree)
+                                xsd_input: str | Path | etree.XMLSchema
+                                ) -> None:
+    """
+    Validate a xml file against a XSD schema
+    :param xml_input: path to the xml file
+    :param xsd_input: path to the XSD schema file or parsed schema
+    """
+    if isinstance(xsd_input, etree.XMLSchema):
+        xsd_schema = xsd_input
+    else:
+        xsd_schema = get_xml_schema(xsd_input)
     xml_tree = etree.parse(xml_input)
     try:
         xsd_schema.assertValid(xml_tree)